@@ -1,13 +1,14 @@
 '''
 Business: Импорт данных о военнослужащих из Excel файлов в базу данных
-Args: event с httpMethod, body (base64 encoded Excel file)
-Returns: HTTP response с результатами импорта
+Args: event с httpMethod, body (base64 encoded Excel file, mode=import|validate)
+Returns: HTTP response с результатами импорта или сводкой проверки
 '''
 
 import json
 import base64
 import os
-from typing import Dict, Any, List, Optional
+import time
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import psycopg2
 from psycopg2.extras import RealDictCursor
@@ -84,6 +85,200 @@ def parse_fitness_category(cat_str: str) -> Optional[str]:
         return 'D'
     return None
 
+def build_col_map(header_row: tuple) -> Dict[str, int]:
+    headers = [str(h).strip().lower() if h else '' for h in header_row]
+    
+    col_map = {}
+    for i, h in enumerate(headers):
+        if 'фио' in h or 'фамилия' in h or 'имя' in h:
+            col_map['full_name'] = i
+        elif 'личный номер' in h or 'личн' in h:
+            col_map['personal_number'] = i
+        elif 'подразделение' in h:
+            col_map['unit'] = i
+        elif 'звание' in h or 'ранг' in h:
+            col_map['rank'] = i
+        elif 'дата рождения' in h or 'др' in h or 'рождения' in h:
+            col_map['birth_date'] = i
+        elif 'дата прибытия' in h or 'прибытие' in h:
+            col_map['arrival_date'] = i
+        elif 'срок исключения' in h or 'срок окончания' in h:
+            col_map['exclusion_date'] = i
+        elif 'категория' in h and ('годн' in h or 'вкк' in h):
+            col_map['fitness_category'] = i
+        elif 'привлечение' in h:
+            col_map['involvement'] = i
+        elif 'склад' in h and 'ивд' in h:
+            col_map['pvd_storage'] = i
+        elif 'количест' in h and 'ивд' in h:
+            col_map['pvd_count'] = i
+        elif 'военный билет' in h or 'вб' in h or 'номер вб' in h:
+            col_map['military_id'] = i
+        elif 'исключение' in h and 'должности' in h:
+            col_map['exclusion_reason'] = i
+        elif 'проблем' in h and 'решени' in h:
+            col_map['issue_status'] = i
+        elif 'статус' in h or 'положение' in h:
+            col_map['status'] = i
+        elif 'вмо' in h:
+            col_map['vmo'] = i
+        elif 'диагноз' in h:
+            col_map['diagnosis'] = i
+        elif 'комментарий' in h or 'примечание' in h or 'заметки' in h or 'ссылка' in h:
+            col_map['notes'] = i
+    return col_map
+
+IMPORT_MODES = {'import', 'validate'}
+
+DATE_COLUMNS = ['birth_date', 'arrival_date', 'exclusion_date']
+TEXT_COLUMNS = ['personal_number', 'full_name', 'unit', 'involvement', 'pvd_storage', 'pvd_count', 'military_id',
+                'exclusion_reason', 'issue_status', 'vmo', 'diagnosis', 'notes']
+DIFF_COLUMNS = ['full_name', 'rank', 'birth_date', 'military_id', 'unit', 'current_status', 'fitness_category', 'notes']
+
+def cell_value(row: tuple, col_map: Dict[str, int], key: str) -> Any:
+    idx = col_map.get(key)
+    if idx is None or idx >= len(row):
+        return None
+    return row[idx]
+
+def parse_row(row: tuple, col_map: Dict[str, int]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    '''Нормализует строку листа; возвращает запись и ошибки по колонкам'''
+    record: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    
+    for key in TEXT_COLUMNS:
+        value = cell_value(row, col_map, key)
+        record[key] = str(value).strip() if value else None
+    
+    for key in DATE_COLUMNS:
+        value = cell_value(row, col_map, key)
+        record[key] = parse_date(value)
+        if value and not record[key]:
+            errors[key] = f'Некорректная дата: {value}'
+    
+    rank_value = cell_value(row, col_map, 'rank')
+    record['rank'] = parse_rank(str(rank_value)) if rank_value else None
+    if rank_value and not record['rank']:
+        errors['rank'] = f'Неизвестное звание: {rank_value}'
+    
+    category_value = cell_value(row, col_map, 'fitness_category')
+    record['fitness_category'] = parse_fitness_category(str(category_value)) if category_value else None
+    if category_value and not record['fitness_category']:
+        errors['fitness_category'] = f'Неизвестная категория годности: {category_value}'
+    
+    status_value = cell_value(row, col_map, 'status')
+    record['current_status'] = parse_status(str(status_value)) if status_value else 'active'
+    
+    if not record['personal_number']:
+        errors['personal_number'] = 'Не указан личный номер'
+    if not record['full_name']:
+        errors['full_name'] = 'Не указано ФИО'
+    
+    return record, errors
+
+def merge_pvd_notes(notes: Optional[str], pvd_storage: Optional[str], pvd_count: Optional[str]) -> Optional[str]:
+    if not (pvd_storage or pvd_count):
+        return notes
+    pvd_notes = f'Склад ИВД: {pvd_storage}, Количество: {pvd_count}' if pvd_storage and pvd_count else pvd_storage or pvd_count
+    if notes:
+        return f'{notes}. ИВД: {pvd_notes}'
+    return f'ИВД: {pvd_notes}'
+
+def validate_workbook(wb, database_url: str) -> Dict[str, Any]:
+    '''Проверка файла без записи в БД: разбор всех листов и одна выборка существующих личных номеров'''
+    started = time.perf_counter()
+    records: Dict[str, Dict[str, Any]] = {}
+    column_errors: Dict[str, int] = {}
+    messages: List[str] = []
+    total_rows = 0
+    invalid = 0
+    merged = 0
+    
+    for sheet_name in wb.sheetnames:
+        rows = wb[sheet_name].iter_rows(values_only=True)
+        header_row = next(rows, None)
+        if not header_row:
+            continue
+        col_map = build_col_map(header_row)
+        seen = set()
+        
+        for idx, row in enumerate(rows, start=2):
+            if not any(v not in (None, '') for v in row):
+                continue
+            total_rows += 1
+            record, errors = parse_row(row, col_map)
+            
+            personal_number = record['personal_number']
+            if personal_number and personal_number in seen:
+                errors['personal_number'] = f'Личный номер {personal_number} повторяется на листе'
+            seen.add(personal_number)
+            
+            if errors:
+                invalid += 1
+                for column, message in errors.items():
+                    column_errors[column] = column_errors.get(column, 0) + 1
+                    if len(messages) < 100:
+                        messages.append(f'[{sheet_name}] Строка {idx}: {message}')
+                continue
+            
+            record['notes'] = merge_pvd_notes(record['notes'], record['pvd_storage'], record['pvd_count'])
+            # Человек с предыдущего листа: импорт перезапишет его данные этой строкой
+            if personal_number in records:
+                merged += 1
+            records[personal_number] = record
+    
+    existing: Dict[str, Dict[str, Any]] = {}
+    if records:
+        conn = psycopg2.connect(database_url)
+        try:
+            conn.set_session(readonly=True)
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(
+                    f"SELECT personal_number, {', '.join(DIFF_COLUMNS)} FROM personnel WHERE personal_number = ANY(%s)",
+                    (list(records.keys()),)
+                )
+                for row in cur.fetchall():
+                    existing[row['personal_number']] = row
+        finally:
+            conn.close()
+    
+    new_count = 0
+    updated = 0
+    unchanged = 0
+    changed_columns: Dict[str, int] = {}
+    
+    for personal_number, record in records.items():
+        current = existing.get(personal_number)
+        if not current:
+            new_count += 1
+            continue
+        changed = [
+            column for column in DIFF_COLUMNS
+            if (str(current[column]) if current[column] is not None else None) != record[column]
+        ]
+        if changed:
+            updated += 1
+            for column in changed:
+                changed_columns[column] = changed_columns.get(column, 0) + 1
+        else:
+            unchanged += 1
+    
+    return {
+        'success': True,
+        'mode': 'validate',
+        'total_rows': total_rows,
+        'new': new_count,
+        'updated': updated,
+        'unchanged': unchanged,
+        'invalid': invalid,
+        'merged': merged,
+        'column_errors': column_errors,
+        'changed_columns': changed_columns,
+        'errors': messages,
+        'sheets_processed': len(wb.sheetnames),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'POST')
     
@@ -128,6 +323,20 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'body': json.dumps({'error': 'Невалидный JSON'}, ensure_ascii=False)
             }
         
+        query_params = event.get('queryStringParameters') or {}
+        mode = body_data.get('mode') or query_params.get('mode', 'import')
+        
+        if mode not in IMPORT_MODES:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'isBase64Encoded': False,
+                'body': json.dumps({'error': f'Неизвестный режим: {mode}. Допустимо: import, validate'}, ensure_ascii=False)
+            }
+        
         file_base64 = body_data.get('file')
         
         if not file_base64:
@@ -142,17 +351,30 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             }
         
         file_bytes = base64.b64decode(file_base64)
-        wb = load_workbook(BytesIO(file_bytes), data_only=True)
+        wb = load_workbook(BytesIO(file_bytes), data_only=True, read_only=(mode == 'validate'))
         
         database_url = os.environ.get('DATABASE_URL')
         if not database_url:
             raise Exception('DATABASE_URL не установлен')
         
+        if mode == 'validate':
+            return {
+                'statusCode': 200,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'isBase64Encoded': False,
+                'body': json.dumps(validate_workbook(wb, database_url), ensure_ascii=False)
+            }
+        
         conn = psycopg2.connect(database_url)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         total_imported = 0
         all_errors = []
+        sheets_with_data = 0
+        touched_ids = set()
         
         for sheet_name in wb.sheetnames:
             ws = wb[sheet_name]
@@ -164,216 +386,194 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 sheet_type = 'hospitalized'
             elif 'отправ' in sheet_name.lower() or 'пвд' in sheet_name.lower():
                 sheet_type = 'dispatch'
-        
-        rows = list(ws.iter_rows(values_only=True))
-        if len(rows) < 2:
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'isBase64Encoded': False,
-                'body': json.dumps({'error': 'Файл пустой или содержит только заголовки'}, ensure_ascii=False)
-            }
-        
-        headers = [str(h).strip().lower() if h else '' for h in rows[0]]
-        
-        col_map = {}
-        for i, h in enumerate(headers):
-            if 'фио' in h or 'фамилия' in h or 'имя' in h:
-                col_map['full_name'] = i
-            elif 'личный номер' in h or 'личн' in h:
-                col_map['personal_number'] = i
-            elif 'подразделение' in h:
-                col_map['unit'] = i
-            elif 'звание' in h or 'ранг' in h:
-                col_map['rank'] = i
-            elif 'дата рождения' in h or 'др' in h or 'рождения' in h:
-                col_map['birth_date'] = i
-            elif 'дата прибытия' in h or 'прибытие' in h:
-                col_map['arrival_date'] = i
-            elif 'срок исключения' in h or 'срок окончания' in h:
-                col_map['exclusion_date'] = i
-            elif 'категория' in h and ('годн' in h or 'вкк' in h):
-                col_map['fitness_category'] = i
-            elif 'привлечение' in h:
-                col_map['involvement'] = i
-            elif 'склад' in h and 'ивд' in h:
-                col_map['pvd_storage'] = i
-            elif 'количест' in h and 'ивд' in h:
-                col_map['pvd_count'] = i
-            elif 'военный билет' in h or 'вб' in h or 'номер вб' in h:
-                col_map['military_id'] = i
-            elif 'исключение' in h and 'должности' in h:
-                col_map['exclusion_reason'] = i
-            elif 'проблем' in h and 'решени' in h:
-                col_map['issue_status'] = i
-            elif 'статус' in h or 'положение' in h:
-                col_map['status'] = i
-            elif 'вмо' in h:
-                col_map['vmo'] = i
-            elif 'диагноз' in h:
-                col_map['diagnosis'] = i
-            elif 'комментарий' in h or 'примечание' in h or 'заметки' in h or 'ссылка' in h:
-                col_map['notes'] = i
-        
+            
+            rows = list(ws.iter_rows(values_only=True))
+            if len(rows) < 2:
+                continue
+            sheets_with_data += 1
+            
+            col_map = build_col_map(rows[0])
+
             imported = 0
             errors = []
-        
-        for idx, row in enumerate(rows[1:], start=2):
-            try:
-                personal_number = str(row[col_map.get('personal_number', -1)]).strip() if col_map.get('personal_number') is not None and row[col_map.get('personal_number', -1)] else None
-                
-                if not personal_number or personal_number == '':
-                    continue
-                
-                full_name = str(row[col_map.get('full_name', 0)]).strip() if col_map.get('full_name') is not None and row[col_map.get('full_name', 0)] else None
-                if not full_name:
-                    continue
-                
-                unit = str(row[col_map.get('unit', -1)]).strip() if col_map.get('unit') is not None and row[col_map.get('unit', -1)] else None
-                rank = parse_rank(str(row[col_map.get('rank', -1)])) if col_map.get('rank') is not None and row[col_map.get('rank', -1)] else None
-                birth_date = parse_date(row[col_map.get('birth_date', -1)]) if col_map.get('birth_date') is not None else None
-                arrival_date = parse_date(row[col_map.get('arrival_date', -1)]) if col_map.get('arrival_date') is not None else None
-                exclusion_date = parse_date(row[col_map.get('exclusion_date', -1)]) if col_map.get('exclusion_date') is not None else None
-                fitness_category = parse_fitness_category(str(row[col_map.get('fitness_category', -1)])) if col_map.get('fitness_category') is not None and row[col_map.get('fitness_category', -1)] else None
-                involvement = str(row[col_map.get('involvement', -1)]).strip() if col_map.get('involvement') is not None and row[col_map.get('involvement', -1)] else None
-                pvd_storage = str(row[col_map.get('pvd_storage', -1)]).strip() if col_map.get('pvd_storage') is not None and row[col_map.get('pvd_storage', -1)] else None
-                pvd_count = str(row[col_map.get('pvd_count', -1)]).strip() if col_map.get('pvd_count') is not None and row[col_map.get('pvd_count', -1)] else None
-                military_id = str(row[col_map.get('military_id', -1)]).strip() if col_map.get('military_id') is not None and row[col_map.get('military_id', -1)] else None
-                exclusion_reason = str(row[col_map.get('exclusion_reason', -1)]).strip() if col_map.get('exclusion_reason') is not None and row[col_map.get('exclusion_reason', -1)] else None
-                issue_status = str(row[col_map.get('issue_status', -1)]).strip() if col_map.get('issue_status') is not None and row[col_map.get('issue_status', -1)] else None
-                status = parse_status(str(row[col_map.get('status', -1)])) if col_map.get('status') is not None and row[col_map.get('status', -1)] else 'active'
-                vmo = str(row[col_map.get('vmo', -1)]).strip() if col_map.get('vmo') is not None and row[col_map.get('vmo', -1)] else None
-                diagnosis = str(row[col_map.get('diagnosis', -1)]).strip() if col_map.get('diagnosis') is not None and row[col_map.get('diagnosis', -1)] else None
-                notes = str(row[col_map.get('notes', -1)]).strip() if col_map.get('notes') is not None and row[col_map.get('notes', -1)] else None
-                
-                cur.execute(
-                    "SELECT id FROM personnel WHERE personal_number = %s",
-                    (personal_number,)
-                )
-                existing = cur.fetchone()
-                
-                if existing:
-                    person_id = existing['id']
-                    cur.execute(
-                        """
-                        UPDATE personnel 
-                        SET full_name = %s, rank = %s, birth_date = %s, military_id = %s, 
-                            unit = %s, current_status = %s, fitness_category = %s, 
-                            notes = %s, updated_at = NOW()
-                        WHERE id = %s
-                        """,
-                        (full_name, rank, birth_date, military_id, unit, status, fitness_category, notes, person_id)
-                    )
-                else:
-                    cur.execute(
-                        """
-                        INSERT INTO personnel (full_name, personal_number, rank, birth_date, military_id, unit, current_status, fitness_category, notes, created_at)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                        RETURNING id
-                        """,
-                        (full_name, personal_number, rank, birth_date, military_id, unit, status, fitness_category, notes)
-                    )
-                    person_id = cur.fetchone()['id']
-                
-                if arrival_date:
-                    cur.execute(
-                        """
-                        INSERT INTO movements (personnel_id, movement_type, start_date, notes, created_at)
-                        VALUES (%s, 'arrival', %s, %s, NOW())
-                        """,
-                        (person_id, arrival_date, 'Прибытие из Excel импорта')
-                    )
-                
-                if status != 'active':
-                    movement_type = status
-                    if status in ['vkk', 'vvk', 'cvvk', 'vvk_category_change', 'ambulatory_treatment']:
-                        movement_type = status
-                    elif status == 'hospitalized':
-                        movement_type = 'hospitalized'
-                    elif status == 'leave':
-                        movement_type = 'leave'
-                    elif status == 'pvd':
-                        movement_type = 'pvd'
+            
+            for idx, row in enumerate(rows[1:], start=2):
+                try:
+                    record, _ = parse_row(row, col_map)
+                    personal_number = record['personal_number']
+                    
+                    if not personal_number or personal_number == '':
+                        continue
+                    
+                    full_name = record['full_name']
+                    if not full_name:
+                        continue
+                    
+                    unit = record['unit']
+                    rank = record['rank']
+                    birth_date = record['birth_date']
+                    arrival_date = record['arrival_date']
+                    exclusion_date = record['exclusion_date']
+                    fitness_category = record['fitness_category']
+                    involvement = record['involvement']
+                    pvd_storage = record['pvd_storage']
+                    pvd_count = record['pvd_count']
+                    military_id = record['military_id']
+                    exclusion_reason = record['exclusion_reason']
+                    issue_status = record['issue_status']
+                    status = record['current_status']
+                    vmo = record['vmo']
+                    diagnosis = record['diagnosis']
+                    notes = record['notes']
                     
                     cur.execute(
-                        """
-                        INSERT INTO movements (personnel_id, movement_type, start_date, vmo, notes, created_at)
-                        VALUES (%s, %s, CURRENT_DATE, %s, %s, NOW())
-                        """,
-                        (person_id, movement_type, vmo, notes)
-                    )
-                
-                if fitness_category:
-                    cur.execute(
-                        """
-                        INSERT INTO medical_checkups (personnel_id, checkup_date, diagnosis, fitness_category, notes, created_at)
-                        VALUES (%s, CURRENT_DATE, %s, %s, %s, NOW())
-                        """,
-                        (person_id, diagnosis or 'Импорт из Excel', fitness_category, notes)
+                        "SELECT id FROM personnel WHERE personal_number = %s",
+                        (personal_number,)
                     )
-                
-                if pvd_storage or pvd_count:
-                    pvd_notes = f'Склад ИВД: {pvd_storage}, Количество: {pvd_count}' if pvd_storage and pvd_count else pvd_storage or pvd_count
-                    if notes:
-                        notes = f'{notes}. ИВД: {pvd_notes}'
+                    existing = cur.fetchone()
+                    
+                    if existing:
+                        person_id = existing['id']
+                        cur.execute(
+                            """
+                            UPDATE personnel 
+                            SET full_name = %s, rank = %s, birth_date = %s, military_id = %s, 
+                                unit = %s, current_status = %s, fitness_category = %s, 
+                                notes = %s, updated_at = NOW()
+                            WHERE id = %s
+                            """,
+                            (full_name, rank, birth_date, military_id, unit, status, fitness_category, notes, person_id)
+                        )
                     else:
-                        notes = f'ИВД: {pvd_notes}'
-                    cur.execute(
-                        "UPDATE personnel SET notes = %s WHERE id = %s",
-                        (notes, person_id)
-                    )
-                
-                if sheet_type == 'leave':
-                    cur.execute(
-                        "SELECT id FROM movements WHERE personnel_id = %s AND movement_type = 'leave' AND end_date IS NULL",
-                        (person_id,)
-                    )
-                    if not cur.fetchone():
+                        cur.execute(
+                            """
+                            INSERT INTO personnel (full_name, personal_number, rank, birth_date, military_id, unit, current_status, fitness_category, notes, created_at)
+                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+                            RETURNING id
+                            """,
+                            (full_name, personal_number, rank, birth_date, military_id, unit, status, fitness_category, notes)
+                        )
+                        person_id = cur.fetchone()['id']
+                    
+                    if arrival_date:
                         cur.execute(
                             """
                             INSERT INTO movements (personnel_id, movement_type, start_date, notes, created_at)
-                            VALUES (%s, 'leave', CURRENT_DATE, %s, NOW())
+                            VALUES (%s, 'arrival', %s, %s, NOW())
                             """,
-                            (person_id, notes or f'Отпуск ({sheet_name})')
+                            (person_id, arrival_date, 'Прибытие из Excel импорта')
                         )
-                elif sheet_type == 'hospitalized':
-                    cur.execute(
-                        "SELECT id FROM movements WHERE personnel_id = %s AND movement_type = 'hospitalized' AND end_date IS NULL",
-                        (person_id,)
-                    )
-                    if not cur.fetchone():
+                    
+                    if status != 'active':
+                        movement_type = status
+                        if status in ['vkk', 'vvk', 'cvvk', 'vvk_category_change', 'ambulatory_treatment']:
+                            movement_type = status
+                        elif status == 'hospitalized':
+                            movement_type = 'hospitalized'
+                        elif status == 'leave':
+                            movement_type = 'leave'
+                        elif status == 'pvd':
+                            movement_type = 'pvd'
+                        
                         cur.execute(
                             """
                             INSERT INTO movements (personnel_id, movement_type, start_date, vmo, notes, created_at)
-                            VALUES (%s, 'hospitalized', CURRENT_DATE, %s, %s, NOW())
+                            VALUES (%s, %s, CURRENT_DATE, %s, %s, NOW())
                             """,
-                            (person_id, vmo, notes or f'Госпитализация ({sheet_name})')
+                            (person_id, movement_type, vmo, notes)
                         )
-                elif sheet_type == 'dispatch':
-                    cur.execute(
-                        "SELECT id FROM movements WHERE personnel_id = %s AND movement_type = 'pvd' AND end_date IS NULL",
-                        (person_id,)
-                    )
-                    if not cur.fetchone():
+                    
+                    if fitness_category:
                         cur.execute(
                             """
-                            INSERT INTO movements (personnel_id, movement_type, start_date, notes, created_at)
-                            VALUES (%s, 'pvd', CURRENT_DATE, %s, NOW())
+                            INSERT INTO medical_checkups (personnel_id, checkup_date, diagnosis, fitness_category, notes, created_at)
+                            VALUES (%s, CURRENT_DATE, %s, %s, %s, NOW())
                             """,
-                            (person_id, notes or f'ПВД ({sheet_name})')
+                            (person_id, diagnosis or 'Импорт из Excel', fitness_category, notes)
                         )
-                
-                imported += 1
-                
-            except Exception as e:
-                errors.append(f'[{sheet_name}] Строка {idx}: {str(e)}')
-        
+                    
+                    if pvd_storage or pvd_count:
+                        notes = merge_pvd_notes(notes, pvd_storage, pvd_count)
+                        cur.execute(
+                            "UPDATE personnel SET notes = %s WHERE id = %s",
+                            (notes, person_id)
+                        )
+                    
+                    if sheet_type == 'leave':
+                        cur.execute(
+                            "SELECT id FROM movements WHERE personnel_id = %s AND movement_type = 'leave' AND end_date IS NULL",
+                            (person_id,)
+                        )
+                        if not cur.fetchone():
+                            cur.execute(
+                                """
+                                INSERT INTO movements (personnel_id, movement_type, start_date, notes, created_at)
+                                VALUES (%s, 'leave', CURRENT_DATE, %s, NOW())
+                                """,
+                                (person_id, notes or f'Отпуск ({sheet_name})')
+                            )
+                    elif sheet_type == 'hospitalized':
+                        cur.execute(
+                            "SELECT id FROM movements WHERE personnel_id = %s AND movement_type = 'hospitalized' AND end_date IS NULL",
+                            (person_id,)
+                        )
+                        if not cur.fetchone():
+                            cur.execute(
+                                """
+                                INSERT INTO movements (personnel_id, movement_type, start_date, vmo, notes, created_at)
+                                VALUES (%s, 'hospitalized', CURRENT_DATE, %s, %s, NOW())
+                                """,
+                                (person_id, vmo, notes or f'Госпитализация ({sheet_name})')
+                            )
+                    elif sheet_type == 'dispatch':
+                        cur.execute(
+                            "SELECT id FROM movements WHERE personnel_id = %s AND movement_type = 'pvd' AND end_date IS NULL",
+                            (person_id,)
+                        )
+                        if not cur.fetchone():
+                            cur.execute(
+                                """
+                                INSERT INTO movements (personnel_id, movement_type, start_date, notes, created_at)
+                                VALUES (%s, 'pvd', CURRENT_DATE, %s, NOW())
+                                """,
+                                (person_id, notes or f'ПВД ({sheet_name})')
+                            )
+                    
+                    imported += 1
+                    touched_ids.add(person_id)
+                    
+                except Exception as e:
+                    errors.append(f'[{sheet_name}] Строка {idx}: {str(e)}')
+            
             total_imported += imported
             all_errors.extend(errors)
         
+        if not sheets_with_data:
+            conn.rollback()
+            cur.close()
+            conn.close()
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'isBase64Encoded': False,
+                'body': json.dumps({'error': 'Файл пустой или содержит только заголовки'}, ensure_ascii=False)
+            }
+        
+        # Импорт перезаписывает статусы — открытые оповещения по затронутым
+        # записям закрываем, следующая оценка пересоздаст актуальные
+        if touched_ids:
+            cur.execute(
+                """
+                UPDATE alerts
+                SET resolved_at = NOW(), updated_at = NOW()
+                WHERE personnel_id = ANY(%s) AND resolved_at IS NULL
+                """,
+                (list(touched_ids),)
+            )
+        
         conn.commit()
         cur.close()
         conn.close()
@@ -382,7 +582,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'statusCode': 200,
             'headers': {
                 'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Expose-Headers': 'X-Write-Token',
+                'X-Write-Token': str(int(time.time() * 1000))
             },
             'isBase64Encoded': False,
             'body': json.dumps({
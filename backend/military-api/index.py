@@ -1,22 +1,66 @@
 """
 Business: API для управления военнослужащими, движениями и медосмотрами
-Args: event - HTTP запрос с методом, телом и параметрами
-Returns: JSON с данными или статистикой
+Args: event - HTTP запрос с методом, телом и параметрами (X-Write-Token для чтения своих записей)
+Returns: JSON с данными или статистикой; заголовки X-DB-Route и X-Replica-Lag
 """
 import json
 import os
+import time
+import base64
+from io import BytesIO
 from datetime import datetime, date
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 
-def get_db_connection():
+READ_ACTIONS = {'personnel', 'personnel_detail', 'export', 'alerts'}
+def env_seconds(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+READ_YOUR_WRITES_WINDOW = env_seconds('READ_YOUR_WRITES_WINDOW', 5.0)
+ALERTS_STALE_AFTER = env_seconds('ALERTS_STALE_AFTER', 3600.0)
+
+def get_db_connection(route: str = 'primary'):
+    if route == 'replica':
+        return psycopg2.connect(os.environ['DATABASE_READ_URL'])
     return psycopg2.connect(os.environ['DATABASE_URL'])
 
+def get_header(event: Dict[str, Any], name: str) -> Optional[str]:
+    headers = event.get('headers') or {}
+    for key, value in headers.items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+def choose_route(event: Dict[str, Any], method: str, action: str) -> str:
+    if method != 'GET' or action not in READ_ACTIONS or not os.environ.get('DATABASE_READ_URL'):
+        return 'primary'
+    query_params = event.get('queryStringParameters') or {}
+    write_token = get_header(event, 'X-Write-Token') or query_params.get('write_token')
+    if write_token:
+        try:
+            if time.time() - int(write_token) / 1000 < READ_YOUR_WRITES_WINDOW:
+                return 'primary'
+        except ValueError:
+            pass
+    return 'replica'
+
+def get_replica_lag(conn) -> Optional[float]:
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT CASE WHEN pg_is_in_recovery()
+                THEN EXTRACT(EPOCH FROM (NOW() - pg_last_xact_replay_timestamp()))
+            END
+        """)
+        lag = cur.fetchone()[0]
+    return round(float(lag), 3) if lag is not None else None
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method = event.get('httpMethod', 'GET')
     query_params = event.get('queryStringParameters') or {}
-    path_params = event.get('pathParams') or {}
     action = query_params.get('action', '')
     
     if method == 'OPTIONS':
@@ -25,46 +69,81 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'headers': {
                 'Access-Control-Allow-Origin': '*',
                 'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
+                'Access-Control-Allow-Headers': 'Content-Type, X-Write-Token, X-Cron-Secret',
                 'Access-Control-Max-Age': '86400'
             },
             'body': '',
             'isBase64Encoded': False
         }
     
+    conn = None
+    replica_lag = None
+    route = choose_route(event, method, action)
+    if route == 'replica':
+        try:
+            conn = get_db_connection('replica')
+            replica_lag = get_replica_lag(conn)
+        except psycopg2.Error:
+            if conn:
+                conn.close()
+            conn = None
+            route = 'primary-fallback'
     try:
-        conn = get_db_connection()
-        
-        if method == 'GET' and action == 'stats':
-            return get_stats(conn)
-        elif method == 'GET' and action == 'personnel_detail':
-            personnel_id = int(query_params.get('id', 0))
-            return get_personnel_detail(conn, personnel_id)
-        elif method == 'GET' and action == 'personnel':
-            return get_personnel_list(conn, query_params)
-        elif method == 'POST' and action == 'create_personnel':
-            body = json.loads(event.get('body', '{}'))
-            return create_personnel(conn, body)
-        elif method == 'PUT' and action == 'update_personnel':
-            personnel_id = int(query_params.get('id', 0))
-            body = json.loads(event.get('body', '{}'))
-            return update_personnel(conn, personnel_id, body)
-        elif method == 'POST' and action == 'add_movement':
-            body = json.loads(event.get('body', '{}'))
-            return add_movement(conn, body)
-        elif method == 'POST' and action == 'add_medical_visit':
-            body = json.loads(event.get('body', '{}'))
-            return add_medical_visit(conn, body)
-        elif method == 'GET' and action == 'export':
-            return export_to_excel(conn, query_params)
-        else:
-            return error_response(404, 'Unknown action')
-            
+        if not conn:
+            conn = get_db_connection('primary')
+        response = dispatch(conn, event, method, action)
     except Exception as e:
-        return error_response(500, str(e))
+        response = error_response(500, str(e))
     finally:
         if conn:
             conn.close()
+    
+    headers = response['headers']
+    headers['X-DB-Route'] = route
+    headers['Access-Control-Expose-Headers'] = 'X-DB-Route, X-Replica-Lag, X-Write-Token'
+    if replica_lag is not None:
+        headers['X-Replica-Lag'] = str(replica_lag)
+    if method != 'GET' and response['statusCode'] == 200:
+        headers['X-Write-Token'] = str(int(time.time() * 1000))
+    return response
+
+def dispatch(conn, event: Dict[str, Any], method: str, action: str) -> Dict[str, Any]:
+    query_params = event.get('queryStringParameters') or {}
+    
+    if method == 'GET' and action == 'stats':
+        return get_stats(conn)
+    elif method == 'GET' and action == 'personnel_detail':
+        personnel_id = int(query_params.get('id', 0))
+        return get_personnel_detail(conn, personnel_id)
+    elif method == 'GET' and action == 'personnel':
+        return get_personnel_list(conn, query_params)
+    elif method == 'POST' and action == 'create_personnel':
+        body = json.loads(event.get('body', '{}'))
+        return create_personnel(conn, body)
+    elif method == 'PUT' and action == 'update_personnel':
+        personnel_id = int(query_params.get('id', 0))
+        body = json.loads(event.get('body', '{}'))
+        return update_personnel(conn, personnel_id, body)
+    elif method == 'POST' and action == 'add_movement':
+        body = json.loads(event.get('body', '{}'))
+        return add_movement(conn, body)
+    elif method == 'POST' and action == 'add_medical_visit':
+        body = json.loads(event.get('body', '{}'))
+        return add_medical_visit(conn, body)
+    elif method == 'POST' and action == 'add_medical_visits_bulk':
+        body = json.loads(event.get('body', '{}'))
+        return add_medical_visits_bulk(conn, body)
+    elif method == 'GET' and action == 'export':
+        return export_to_excel(conn, query_params)
+    elif method == 'GET' and action == 'alerts':
+        return get_alerts(conn, query_params)
+    elif method == 'POST' and action == 'evaluate_alerts':
+        cron_secret = os.environ.get('ALERTS_CRON_SECRET')
+        if cron_secret and get_header(event, 'X-Cron-Secret') != cron_secret:
+            return error_response(403, 'Forbidden')
+        return evaluate_alerts(conn)
+    else:
+        return error_response(404, 'Unknown action')
 
 def get_stats(conn) -> Dict[str, Any]:
     with conn.cursor(cursor_factory=RealDictCursor) as cur:
@@ -90,30 +169,28 @@ def get_stats(conn) -> Dict[str, Any]:
         stats = cur.fetchone()
         
         cur.execute("""
-            SELECT COUNT(*) as count
-            FROM personnel
-            WHERE current_status = 'госпитализация' 
-            AND days_in_current_status > 30
-        """)
-        hosp_alert = cur.fetchone()['count']
-        
-        cur.execute("""
-            SELECT COUNT(*) as count
-            FROM personnel
-            WHERE current_status = 'в_пвд' 
-            AND days_in_current_status > 30
-        """)
-        pvd_alert = cur.fetchone()['count']
+            SELECT evaluated_at > NOW() - %s * INTERVAL '1 second' as fresh
+            FROM alert_evaluations
+            ORDER BY id DESC
+            LIMIT 1
+        """, (ALERTS_STALE_AFTER,))
+        last_evaluation = cur.fetchone()
+        alerts_source = 'table' if last_evaluation and last_evaluation['fresh'] else 'live'
         
-        cur.execute("""
-            SELECT COUNT(*) as count
-            FROM movements m
-            JOIN personnel p ON p.id = m.personnel_id
-            WHERE m.movement_type = 'отпуск'
-            AND m.expected_return_date < CURRENT_DATE
-            AND p.current_status = 'отпуск'
-        """)
-        leave_alert = cur.fetchone()['count']
+        if alerts_source == 'table':
+            cur.execute("""
+                SELECT alert_type, COUNT(*) as count
+                FROM alerts
+                WHERE resolved_at IS NULL
+                GROUP BY alert_type
+            """)
+        else:
+            cur.execute(f"""
+                SELECT alert_type, COUNT(*) as count
+                FROM ({ALERT_CONDITIONS_SQL}) current_alerts
+                GROUP BY alert_type
+            """)
+        alert_counts = {row['alert_type']: row['count'] for row in cur.fetchall()}
         
         conn.commit()
         
@@ -128,10 +205,11 @@ def get_stats(conn) -> Dict[str, Any]:
         'ambulatory': stats['ambulatory'],
         'uvolnenie': stats['uvolnenie'],
         'alerts': {
-            'hosp_over_30': hosp_alert,
-            'pvd_over_30': pvd_alert,
-            'leave_overdue': leave_alert
-        }
+            'hosp_over_30': alert_counts.get('hosp_over_30', 0),
+            'pvd_over_30': alert_counts.get('pvd_over_30', 0),
+            'leave_overdue': alert_counts.get('leave_overdue', 0)
+        },
+        'alerts_source': alerts_source
     })
 
 def get_personnel_list(conn, query_params: Dict) -> Dict[str, Any]:
@@ -239,6 +317,7 @@ def update_personnel(conn, personnel_id: int, data: Dict) -> Dict[str, Any]:
             personnel_id
         ))
         personnel = cur.fetchone()
+        resolve_alerts(cur, personnel_id, data.get('current_status'))
         conn.commit()
         
     return success_response(dict(personnel))
@@ -289,6 +368,7 @@ def add_movement(conn, data: Dict) -> Dict[str, Any]:
                 SET current_status = %s, status_changed_at = NOW(), days_in_current_status = 0, updated_at = NOW()
                 WHERE id = %s
             """, (new_status, data['personnel_id']))
+            resolve_alerts(cur, data['personnel_id'])
         
         conn.commit()
         
@@ -321,6 +401,186 @@ def add_medical_visit(conn, data: Dict) -> Dict[str, Any]:
         
     return success_response(dict(visit))
 
+def normalize_date(value: Any) -> Optional[str]:
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, str):
+        for fmt in ['%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y']:
+            try:
+                return datetime.strptime(value.strip(), fmt).strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+    return None
+
+FITNESS_CATEGORY_LETTERS = {'А': 'А', 'A': 'А', 'Б': 'Б', 'B': 'Б', 'В': 'В', 'V': 'В', 'Г': 'Г', 'G': 'Г', 'Д': 'Д', 'D': 'Д'}
+DOCTOR_SPECIALTY_MAX_LENGTH = 100
+
+def normalize_fitness_category(value: Any) -> Optional[str]:
+    category = str(value).strip().upper()
+    letter = FITNESS_CATEGORY_LETTERS.get(category[:1])
+    suffix = category[1:]
+    if letter in ('А', 'Б', 'В') and suffix in ('', '1', '2', '3', '4'):
+        return letter
+    if letter in ('Г', 'Д') and suffix == '':
+        return letter
+    return None
+
+def read_visits_sheet(file_base64: str) -> List[Tuple[int, Dict[str, Any]]]:
+    from openpyxl import load_workbook
+    
+    wb = load_workbook(BytesIO(base64.b64decode(file_base64)), data_only=True, read_only=True)
+    rows = wb.worksheets[0].iter_rows(values_only=True)
+    headers = [str(h).strip().lower() if h else '' for h in next(rows, ())]
+    
+    col_map = {}
+    for i, h in enumerate(headers):
+        if 'личн' in h:
+            col_map['personal_number'] = i
+        elif h == 'дата' or 'дата посещ' in h or 'дата осмотра' in h:
+            col_map['visit_date'] = i
+        elif 'специальн' in h or 'врач' in h:
+            col_map['doctor_specialty'] = i
+        elif 'диагноз' in h:
+            col_map['diagnosis'] = i
+        elif 'рекоменд' in h:
+            col_map['recommendations'] = i
+        elif 'категория' in h:
+            col_map['fitness_category'] = i
+    
+    visits = []
+    for row_number, row in enumerate(rows, start=2):
+        visit = {}
+        for key, idx in col_map.items():
+            value = row[idx] if idx < len(row) else None
+            visit[key] = value if isinstance(value, (datetime, date)) else (str(value).strip() if value else None)
+        if any(visit.values()):
+            visits.append((row_number, visit))
+    return visits
+
+def add_medical_visits_bulk(conn, data: Dict) -> Dict[str, Any]:
+    # Для листа ошибки ссылаются на строку Excel, для JSON — на номер записи
+    if data.get('file'):
+        visits = read_visits_sheet(data['file'])
+        label = 'Строка'
+    else:
+        visits = data.get('visits', [])
+        if not isinstance(visits, list):
+            return error_response(400, 'visits должен быть списком')
+        visits = list(enumerate(visits, start=1))
+        label = 'Запись'
+    
+    errors = []
+    candidates = []
+    for idx, visit in visits:
+        if not isinstance(visit, dict):
+            errors.append(f'{label} {idx}: ожидается объект')
+            continue
+        
+        personnel_id = None
+        if visit.get('personnel_id') not in (None, ''):
+            try:
+                personnel_id = int(visit['personnel_id'])
+            except (TypeError, ValueError):
+                errors.append(f'{label} {idx}: некорректный personnel_id')
+                continue
+        personal_number = str(visit['personal_number']).strip() if visit.get('personal_number') else None
+        if not personnel_id and not personal_number:
+            errors.append(f'{label} {idx}: не указан военнослужащий')
+            continue
+        
+        visit_date = normalize_date(visit.get('visit_date'))
+        if not visit_date:
+            errors.append(f'{label} {idx}: некорректная дата посещения')
+            continue
+        
+        doctor_specialty = str(visit['doctor_specialty']).strip() if visit.get('doctor_specialty') else ''
+        if not doctor_specialty:
+            errors.append(f'{label} {idx}: не указана специальность врача')
+            continue
+        if len(doctor_specialty) > DOCTOR_SPECIALTY_MAX_LENGTH:
+            errors.append(f'{label} {idx}: специальность врача длиннее {DOCTOR_SPECIALTY_MAX_LENGTH} символов')
+            continue
+        
+        fitness_category = None
+        if visit.get('fitness_category'):
+            fitness_category = normalize_fitness_category(visit['fitness_category'])
+            if not fitness_category:
+                errors.append(f'{label} {idx}: неизвестная категория годности {visit["fitness_category"]}')
+                continue
+        
+        diagnosis = str(visit['diagnosis']) if visit.get('diagnosis') else None
+        recommendations = str(visit['recommendations']) if visit.get('recommendations') else None
+        candidates.append((idx, personnel_id, personal_number, visit_date, doctor_specialty,
+                           diagnosis, recommendations, fitness_category))
+    
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        ids = [c[1] for c in candidates if c[1]]
+        numbers = [c[2] for c in candidates if not c[1]]
+        cur.execute(
+            "SELECT id, personal_number FROM personnel WHERE id = ANY(%s) OR personal_number = ANY(%s)",
+            (ids, numbers)
+        )
+        known_ids = set()
+        id_by_number = {}
+        for row in cur.fetchall():
+            known_ids.add(row['id'])
+            id_by_number[row['personal_number']] = row['id']
+        
+        rows = []
+        for idx, personnel_id, personal_number, visit_date, doctor_specialty, diagnosis, recommendations, fitness_category in candidates:
+            personnel_id = personnel_id or id_by_number.get(personal_number)
+            if not personnel_id or personnel_id not in known_ids:
+                errors.append(f'{label} {idx}: военнослужащий не найден')
+                continue
+            rows.append((idx, personnel_id, visit_date, doctor_specialty, diagnosis, recommendations, fitness_category))
+        
+        inserted = 0
+        categories_updated = 0
+        if rows:
+            # Блокируем строки personnel в порядке id, чтобы параллельные загрузки не ловили deadlock.
+            # FOR NO KEY UPDATE совместим с FOR KEY SHARE, который берёт FK при вставке в medical_visits
+            cur.execute(
+                "SELECT id FROM personnel WHERE id = ANY(%s) ORDER BY id FOR NO KEY UPDATE",
+                (sorted({r[1] for r in rows if r[6]}),)
+            )
+            result = execute_values(cur, """
+                WITH data (seq, personnel_id, visit_date, doctor_specialty, diagnosis, recommendations, fitness_category) AS (
+                    VALUES %s
+                ),
+                inserted AS (
+                    INSERT INTO medical_visits (personnel_id, visit_date, doctor_specialty, diagnosis, recommendations)
+                    SELECT personnel_id, visit_date, doctor_specialty, diagnosis, recommendations FROM data
+                    ORDER BY seq
+                    RETURNING 1
+                ),
+                latest AS (
+                    SELECT DISTINCT ON (personnel_id) personnel_id, visit_date, fitness_category
+                    FROM data
+                    WHERE fitness_category IS NOT NULL
+                    ORDER BY personnel_id, visit_date DESC, seq DESC
+                ),
+                updated AS (
+                    UPDATE personnel p
+                    SET fitness_category = l.fitness_category, fitness_category_date = l.visit_date, updated_at = NOW()
+                    FROM latest l
+                    WHERE p.id = l.personnel_id
+                    AND (p.fitness_category_date IS NULL OR l.visit_date >= p.fitness_category_date)
+                    RETURNING 1
+                )
+                SELECT (SELECT COUNT(*) FROM inserted) as inserted, (SELECT COUNT(*) FROM updated) as updated
+            """, rows, template='(%s::integer, %s::integer, %s::date, %s::text, %s::text, %s::text, %s::text)', page_size=len(rows), fetch=True)
+            inserted = result[0]['inserted']
+            categories_updated = result[0]['updated']
+        
+        conn.commit()
+        
+    return success_response({
+        'inserted': inserted,
+        'categories_updated': categories_updated,
+        'skipped': len(visits) - len(rows),
+        'errors': errors[:100]
+    })
+
 def export_to_excel(conn, query_params: Dict) -> Dict[str, Any]:
     with conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute("SELECT * FROM personnel ORDER BY unit, full_name")
@@ -331,6 +591,135 @@ def export_to_excel(conn, query_params: Dict) -> Dict[str, Any]:
         'message': 'Export data ready'
     })
 
+ALERT_CONDITIONS_SQL = """
+    SELECT id AS personnel_id, 'hosp_over_30' AS alert_type, status_changed_at AS since,
+           CASE WHEN status_changed_at <= NOW() - INTERVAL '61 days' THEN 'critical' ELSE 'warning' END AS severity
+    FROM personnel
+    WHERE current_status = 'госпитализация'
+    AND status_changed_at <= NOW() - INTERVAL '31 days'
+    UNION ALL
+    SELECT id, 'pvd_over_30', status_changed_at,
+           CASE WHEN status_changed_at <= NOW() - INTERVAL '61 days' THEN 'critical' ELSE 'warning' END
+    FROM personnel
+    WHERE current_status = 'в_пвд'
+    AND status_changed_at <= NOW() - INTERVAL '31 days'
+    UNION ALL
+    SELECT personnel_id, 'leave_overdue', expected_return_date::timestamp,
+           CASE WHEN expected_return_date < CURRENT_DATE - 7 THEN 'critical' ELSE 'warning' END
+    FROM (
+        SELECT DISTINCT ON (m.personnel_id) m.personnel_id, m.expected_return_date
+        FROM movements m
+        JOIN personnel p ON p.id = m.personnel_id
+        WHERE m.movement_type = 'отпуск'
+        AND p.current_status = 'отпуск'
+        ORDER BY m.personnel_id, m.start_date DESC, m.id DESC
+    ) last_leave
+    WHERE expected_return_date < CURRENT_DATE
+"""
+
+STATUS_ALERT_TYPES = {
+    'госпитализация': 'hosp_over_30',
+    'в_пвд': 'pvd_over_30',
+    'отпуск': 'leave_overdue'
+}
+
+def evaluate_alerts(conn) -> Dict[str, Any]:
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(f"""
+            WITH current_alerts AS ({ALERT_CONDITIONS_SQL}),
+            upserted AS (
+                INSERT INTO alerts (personnel_id, alert_type, since, severity)
+                SELECT personnel_id, alert_type, since, severity FROM current_alerts
+                ON CONFLICT (personnel_id, alert_type) WHERE resolved_at IS NULL
+                DO UPDATE SET since = EXCLUDED.since, severity = EXCLUDED.severity, updated_at = NOW()
+                WHERE alerts.since IS DISTINCT FROM EXCLUDED.since
+                OR alerts.severity IS DISTINCT FROM EXCLUDED.severity
+                RETURNING 1
+            ),
+            resolved AS (
+                UPDATE alerts a
+                SET resolved_at = NOW(), updated_at = NOW()
+                WHERE a.resolved_at IS NULL
+                AND NOT EXISTS (
+                    SELECT 1 FROM current_alerts c
+                    WHERE c.personnel_id = a.personnel_id AND c.alert_type = a.alert_type
+                )
+                RETURNING 1
+            )
+            INSERT INTO alert_evaluations (active, upserted, resolved)
+            SELECT
+                (SELECT COUNT(*) FROM current_alerts),
+                (SELECT COUNT(*) FROM upserted),
+                (SELECT COUNT(*) FROM resolved)
+            RETURNING evaluated_at, active, upserted, resolved
+        """)
+        result = cur.fetchone()
+        conn.commit()
+        
+    return success_response(dict(result))
+
+def resolve_alerts(cur, personnel_id: int, status: Optional[str] = None):
+    cur.execute("""
+        UPDATE alerts
+        SET resolved_at = NOW(), updated_at = NOW()
+        WHERE personnel_id = %s AND resolved_at IS NULL
+        AND alert_type IS DISTINCT FROM %s
+    """, (personnel_id, STATUS_ALERT_TYPES.get(status)))
+
+def get_alerts(conn, query_params: Dict) -> Dict[str, Any]:
+    alert_type = query_params.get('type', '')
+    severity = query_params.get('severity', '')
+    try:
+        limit = min(max(int(query_params.get('limit', 50)), 0), 500)
+        offset = max(int(query_params.get('offset', 0)), 0)
+    except ValueError:
+        return error_response(400, 'limit и offset должны быть целыми числами')
+    
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        query = """
+            SELECT a.id, a.personnel_id, a.alert_type, a.since, a.severity,
+                   p.full_name, p.personal_number, p.rank, p.unit, p.current_status
+            FROM alerts a
+            JOIN personnel p ON p.id = a.personnel_id
+            WHERE a.resolved_at IS NULL
+        """
+        params = []
+        
+        if alert_type:
+            query += " AND a.alert_type = %s"
+            params.append(alert_type)
+        
+        if severity:
+            query += " AND a.severity = %s"
+            params.append(severity)
+        
+        query += " ORDER BY a.since, a.id LIMIT %s OFFSET %s"
+        params.extend([limit, offset])
+        
+        cur.execute(query, params)
+        alerts = cur.fetchall()
+        
+        cur.execute("""
+            SELECT alert_type, severity, COUNT(*) as count
+            FROM alerts
+            WHERE resolved_at IS NULL
+            GROUP BY alert_type, severity
+        """)
+        counts = {}
+        total = 0
+        for row in cur.fetchall():
+            counts[row['alert_type']] = counts.get(row['alert_type'], 0) + row['count']
+            if (not alert_type or row['alert_type'] == alert_type) and (not severity or row['severity'] == severity):
+                total += row['count']
+        
+    return success_response({
+        'alerts': [dict(a) for a in alerts],
+        'counts': counts,
+        'total': total,
+        'limit': limit,
+        'offset': offset
+    })
+
 def success_response(data: Any) -> Dict[str, Any]:
     return {
         'statusCode': 200,
@@ -0,0 +1,16 @@
+-- Предрасчитанные оповещения (заполняются действием evaluate_alerts по расписанию)
+CREATE TABLE IF NOT EXISTS alerts (
+    id SERIAL PRIMARY KEY,
+    personnel_id INTEGER NOT NULL REFERENCES personnel(id),
+    alert_type VARCHAR(50) NOT NULL,
+    since TIMESTAMP NOT NULL,
+    severity VARCHAR(20) NOT NULL DEFAULT 'warning',
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW(),
+    resolved_at TIMESTAMP
+);
+
+-- Одно открытое оповещение каждого типа на человека
+CREATE UNIQUE INDEX IF NOT EXISTS idx_alerts_open_unique ON alerts(personnel_id, alert_type) WHERE resolved_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_alerts_open_type_since ON alerts(alert_type, since) WHERE resolved_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_alerts_open_since ON alerts(since) WHERE resolved_at IS NULL;
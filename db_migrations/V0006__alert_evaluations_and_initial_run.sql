@@ -0,0 +1,43 @@
+-- Журнал запусков evaluate_alerts; по последней записи stats решает, свежа ли таблица alerts
+CREATE TABLE IF NOT EXISTS alert_evaluations (
+    id SERIAL PRIMARY KEY,
+    evaluated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    active INTEGER NOT NULL DEFAULT 0,
+    upserted INTEGER NOT NULL DEFAULT 0,
+    resolved INTEGER NOT NULL DEFAULT 0
+);
+
+-- Первичное заполнение alerts теми же условиями, что и evaluate_alerts
+WITH current_alerts AS (
+    SELECT id AS personnel_id, 'hosp_over_30' AS alert_type, status_changed_at AS since,
+           CASE WHEN status_changed_at <= NOW() - INTERVAL '61 days' THEN 'critical' ELSE 'warning' END AS severity
+    FROM personnel
+    WHERE current_status = 'госпитализация'
+    AND status_changed_at <= NOW() - INTERVAL '31 days'
+    UNION ALL
+    SELECT id, 'pvd_over_30', status_changed_at,
+           CASE WHEN status_changed_at <= NOW() - INTERVAL '61 days' THEN 'critical' ELSE 'warning' END
+    FROM personnel
+    WHERE current_status = 'в_пвд'
+    AND status_changed_at <= NOW() - INTERVAL '31 days'
+    UNION ALL
+    SELECT personnel_id, 'leave_overdue', expected_return_date::timestamp,
+           CASE WHEN expected_return_date < CURRENT_DATE - 7 THEN 'critical' ELSE 'warning' END
+    FROM (
+        SELECT DISTINCT ON (m.personnel_id) m.personnel_id, m.expected_return_date
+        FROM movements m
+        JOIN personnel p ON p.id = m.personnel_id
+        WHERE m.movement_type = 'отпуск'
+        AND p.current_status = 'отпуск'
+        ORDER BY m.personnel_id, m.start_date DESC, m.id DESC
+    ) last_leave
+    WHERE expected_return_date < CURRENT_DATE
+),
+inserted AS (
+    INSERT INTO alerts (personnel_id, alert_type, since, severity)
+    SELECT personnel_id, alert_type, since, severity FROM current_alerts
+    ON CONFLICT (personnel_id, alert_type) WHERE resolved_at IS NULL DO NOTHING
+    RETURNING 1
+)
+INSERT INTO alert_evaluations (active, upserted, resolved)
+SELECT (SELECT COUNT(*) FROM current_alerts), (SELECT COUNT(*) FROM inserted), 0;
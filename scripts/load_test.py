@@ -0,0 +1,359 @@
+'''
+Business: Нагрузочный тест функций military-api и import-excel на локальной Postgres
+Args: параметры командной строки (число опрашивающих потоков, писателей, импортов, длительность)
+Returns: отчёт с пропускной способностью, задержками, ожиданиями блокировок и deadlock'ами
+'''
+
+import argparse
+import base64
+import importlib.util
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from io import BytesIO
+from typing import Dict, Any, List, Callable, Optional
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from openpyxl import Workbook
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+
+MOVEMENT_TYPES = ['госпитализация', 'отпуск', 'в_строй', 'прибыл', 'амбулаторное_лечение']
+
+FITNESS_CATEGORIES = ['А', 'Б', 'В', 'Г', 'Д']
+
+
+def load_handler(function_name: str) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+    path = os.path.join(BACKEND_DIR, function_name, 'index.py')
+    spec = importlib.util.spec_from_file_location(function_name.replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.handler
+
+
+def build_workbook(rows: int, offset: int) -> str:
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Личный состав'
+    ws.append(['ФИО', 'Личный номер', 'Подразделение', 'Звание', 'Статус'])
+    for i in range(rows):
+        n = offset + i
+        ws.append([
+            f'Нагрузочный Тест {n}',
+            f'LT-{n:06d}',
+            f'Рота {n % 10 + 1}',
+            random.choice(['рядовой', 'сержант', 'лейтенант']),
+            random.choice(['в части', 'отпуск', 'госпиталь', 'пвд'])
+        ])
+    buf = BytesIO()
+    wb.save(buf)
+    return base64.b64encode(buf.getvalue()).decode('ascii')
+
+
+def seed_personnel(database_url: str, count: int) -> List[int]:
+    conn = psycopg2.connect(database_url)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM personnel WHERE personal_number LIKE 'LT-%'")
+            existing = cur.fetchone()[0]
+            if existing < count:
+                cur.execute("""
+                    INSERT INTO personnel (personal_number, full_name, unit, current_status, status_changed_at)
+                    SELECT 'LT-' || LPAD(g::text, 6, '0'), 'Нагрузочный Тест ' || g,
+                           'Рота ' || (g %% 10 + 1), 'в_пвд', NOW() - (g %% 60) * INTERVAL '1 day'
+                    FROM generate_series(%s, %s) g
+                    ON CONFLICT (personal_number) DO NOTHING
+                """, (existing, count - 1))
+            cur.execute("SELECT id FROM personnel WHERE personal_number LIKE 'LT-%' ORDER BY id")
+            ids = [row[0] for row in cur.fetchall()]
+        conn.commit()
+        return ids
+    finally:
+        conn.close()
+
+
+TEST_TABLES = ['alerts', 'medical_visits', 'medical_checkups', 'movements']
+
+# Бэкенды сбрасывают накопленную статистику не чаще раза в секунду
+STATS_FLUSH_DELAY = 1.5
+
+
+def cleanup_personnel(database_url: str) -> int:
+    conn = psycopg2.connect(database_url)
+    try:
+        with conn.cursor() as cur:
+            for table in TEST_TABLES:
+                cur.execute("SELECT to_regclass(%s)", (table,))
+                if cur.fetchone()[0] is None:
+                    continue
+                cur.execute(f"""
+                    DELETE FROM {table}
+                    WHERE personnel_id IN (SELECT id FROM personnel WHERE personal_number LIKE 'LT-%%')
+                """)
+            cur.execute("DELETE FROM personnel WHERE personal_number LIKE 'LT-%'")
+            deleted = cur.rowcount
+        conn.commit()
+        return deleted
+    finally:
+        conn.close()
+
+
+def read_deadlocks(cur) -> int:
+    cur.execute("SELECT pg_stat_clear_snapshot()")
+    cur.execute("SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()")
+    return cur.fetchone()['deadlocks']
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, op: str, elapsed: float, ok: bool):
+        with self.lock:
+            self.latencies.setdefault(op, []).append(elapsed)
+            if not ok:
+                self.errors[op] = self.errors.get(op, 0) + 1
+
+
+class LockMonitor(threading.Thread):
+    '''Периодически снимает ожидания блокировок из pg_stat_activity и pg_locks'''
+
+    def __init__(self, database_url: str, interval: float):
+        super().__init__(daemon=True)
+        self.database_url = database_url
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.samples = 0
+        self.waiting_total = 0
+        self.waiting_max = 0
+        self.ungranted_max = 0
+        self.max_wait_seconds = 0.0
+        self.blocked_queries: Dict[str, int] = {}
+
+    def run(self):
+        conn = psycopg2.connect(self.database_url)
+        conn.autocommit = True
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                while not self.stop_event.is_set():
+                    cur.execute("""
+                        SELECT COUNT(*) AS count
+                        FROM pg_stat_activity
+                        WHERE datname = current_database()
+                        AND wait_event_type = 'Lock'
+                    """)
+                    waiting = cur.fetchone()['count']
+                    # waitstart (PostgreSQL 14+) — момент начала ожидания именно этой блокировки
+                    cur.execute("""
+                        SELECT left(a.query, 80) AS query,
+                               EXTRACT(EPOCH FROM (NOW() - l.waitstart)) AS waited
+                        FROM pg_locks l
+                        JOIN pg_stat_activity a ON a.pid = l.pid
+                        WHERE NOT l.granted AND a.datname = current_database()
+                    """)
+                    ungranted = cur.fetchall()
+
+                    self.samples += 1
+                    self.waiting_total += waiting
+                    self.waiting_max = max(self.waiting_max, waiting)
+                    self.ungranted_max = max(self.ungranted_max, len(ungranted))
+                    for row in ungranted:
+                        self.max_wait_seconds = max(self.max_wait_seconds, float(row['waited'] or 0))
+                        key = ' '.join(row['query'].split())
+                        self.blocked_queries[key] = self.blocked_queries.get(key, 0) + 1
+                    self.stop_event.wait(self.interval)
+        finally:
+            conn.close()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_worker(op: str, call: Callable[[], Dict[str, Any]], recorder: Recorder,
+               deadline: float, pause: float):
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            response = call()
+            ok = response.get('statusCode') == 200
+        except Exception:
+            ok = False
+        recorder.record(op, time.perf_counter() - started, ok)
+        if pause:
+            time.sleep(pause)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description='Нагрузочный тест: опрос дашборда + движения + импорт Excel')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'))
+    parser.add_argument('--pollers', type=int, default=8, help='потоков, опрашивающих stats и personnel')
+    parser.add_argument('--writers', type=int, default=4, help='потоков, вызывающих add_movement')
+    parser.add_argument('--importers', type=int, default=1, help='потоков, запускающих импорт Excel')
+    parser.add_argument('--validators', type=int, default=0, help='потоков, запускающих проверку файла (mode=validate)')
+    parser.add_argument('--bulk-writers', type=int, default=0, help='потоков, вызывающих add_medical_visits_bulk')
+    parser.add_argument('--bulk-size', type=int, default=1000, help='посещений в одном bulk-запросе')
+    parser.add_argument('--bulk-category-share', type=float, default=0.3,
+                        help='доля bulk-посещений с категорией годности (остальные без неё)')
+    parser.add_argument('--import-rows', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=1000, help='сколько тестовых военнослужащих создать')
+    parser.add_argument('--duration', type=float, default=30.0, help='секунд')
+    parser.add_argument('--poll-interval', type=float, default=0.0, help='пауза между запросами опроса, сек')
+    parser.add_argument('--sample-interval', type=float, default=0.2, help='период снятия блокировок, сек')
+    parser.add_argument('--json', action='store_true', help='вывести отчёт в JSON')
+    parser.add_argument('--cleanup', action='store_true',
+                        help='удалить тестовых военнослужащих LT-* и связанные записи после прогона')
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        parser.error('DATABASE_URL не установлен')
+    os.environ['DATABASE_URL'] = args.database_url
+
+    military_api = load_handler('military-api')
+    import_excel = load_handler('import-excel')
+
+    person_ids = seed_personnel(args.database_url, args.seed)
+    workbooks = [build_workbook(args.import_rows, offset=i * args.import_rows) for i in range(max(args.importers, 1))]
+
+    def poll_stats() -> Dict[str, Any]:
+        return military_api({'httpMethod': 'GET', 'queryStringParameters': {'action': 'stats'}}, None)
+
+    def poll_personnel() -> Dict[str, Any]:
+        return military_api({'httpMethod': 'GET', 'queryStringParameters': {'action': 'personnel'}}, None)
+
+    def write_movement() -> Dict[str, Any]:
+        movement_type = random.choice(MOVEMENT_TYPES)
+        body = {
+            'personnel_id': random.choice(person_ids),
+            'movement_type': movement_type,
+            'start_date': (date.today() - timedelta(days=random.randint(0, 45))).strftime('%Y-%m-%d')
+        }
+        if movement_type == 'отпуск':
+            body['leave_days'] = random.randint(5, 30)
+        return military_api({
+            'httpMethod': 'POST',
+            'queryStringParameters': {'action': 'add_movement'},
+            'body': json.dumps(body)
+        }, None)
+
+    def write_visits_bulk() -> Dict[str, Any]:
+        visits = [{
+            'personnel_id': random.choice(person_ids),
+            'visit_date': (date.today() - timedelta(days=random.randint(0, 30))).strftime('%Y-%m-%d'),
+            'doctor_specialty': 'ВВК',
+            'fitness_category': (random.choice(FITNESS_CATEGORIES)
+                                 if random.random() < args.bulk_category_share else None)
+        } for _ in range(args.bulk_size)]
+        return military_api({
+            'httpMethod': 'POST',
+            'queryStringParameters': {'action': 'add_medical_visits_bulk'},
+            'body': json.dumps({'visits': visits})
+        }, None)
+
+    def make_import(file_base64: str, mode: str = 'import') -> Callable[[], Dict[str, Any]]:
+        body = json.dumps({'file': file_base64, 'mode': mode})
+        return lambda: import_excel({'httpMethod': 'POST', 'body': body}, None)
+
+    conn = psycopg2.connect(args.database_url)
+    conn.autocommit = True
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    deadlocks_before = read_deadlocks(cur)
+
+    recorder = Recorder()
+    monitor = LockMonitor(args.database_url, args.sample_interval)
+    monitor.start()
+
+    workers = args.pollers + args.writers + args.importers + args.validators + args.bulk_writers
+    started = time.monotonic()
+    deadline = started + args.duration
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        for i in range(args.pollers):
+            op, call = ('stats', poll_stats) if i % 2 == 0 else ('personnel', poll_personnel)
+            pool.submit(run_worker, op, call, recorder, deadline, args.poll_interval)
+        for _ in range(args.writers):
+            pool.submit(run_worker, 'add_movement', write_movement, recorder, deadline, 0.0)
+        for i in range(args.importers):
+            pool.submit(run_worker, 'import', make_import(workbooks[i]), recorder, deadline, 0.0)
+        for _ in range(args.bulk_writers):
+            pool.submit(run_worker, 'bulk_medical', write_visits_bulk, recorder, deadline, 0.0)
+        for i in range(args.validators):
+            pool.submit(run_worker, 'validate', make_import(workbooks[i % len(workbooks)], 'validate'),
+                        recorder, deadline, 0.0)
+    elapsed = time.monotonic() - started
+
+    monitor.stop_event.set()
+    monitor.join()
+    time.sleep(STATS_FLUSH_DELAY)
+    deadlocks = read_deadlocks(cur) - deadlocks_before
+    cur.close()
+    conn.close()
+
+    report = {
+        'duration_sec': round(elapsed, 2),
+        'operations': {},
+        'locks': {
+            'samples': monitor.samples,
+            'avg_waiting': round(monitor.waiting_total / monitor.samples, 2) if monitor.samples else 0,
+            'max_waiting': monitor.waiting_max,
+            'max_ungranted_locks': monitor.ungranted_max,
+            'max_wait_sec': round(monitor.max_wait_seconds, 3),
+            'top_blocked': sorted(monitor.blocked_queries.items(), key=lambda kv: -kv[1])[:5]
+        },
+        'deadlocks': deadlocks
+    }
+    for op, values in sorted(recorder.latencies.items()):
+        report['operations'][op] = {
+            'count': len(values),
+            'errors': recorder.errors.get(op, 0),
+            'rps': round(len(values) / elapsed, 2) if elapsed else 0,
+            'p50_ms': round(percentile(values, 50) * 1000, 1),
+            'p95_ms': round(percentile(values, 95) * 1000, 1),
+            'p99_ms': round(percentile(values, 99) * 1000, 1),
+            'max_ms': round(max(values) * 1000, 1)
+        }
+    operations = report['operations']
+    if 'import' in operations and 'validate' in operations and operations['validate']['p50_ms']:
+        report['validate_speedup'] = round(operations['import']['p50_ms'] / operations['validate']['p50_ms'], 1)
+    if 'bulk_medical' in operations:
+        report['bulk_visits_per_sec'] = round(operations['bulk_medical']['rps'] * args.bulk_size)
+    if args.cleanup:
+        report['cleaned_up'] = cleanup_personnel(args.database_url)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"Длительность: {report['duration_sec']} с")
+    print(f"{'операция':<14}{'кол-во':>8}{'ошибки':>8}{'rps':>9}{'p50 мс':>10}{'p95 мс':>10}{'p99 мс':>10}{'max мс':>10}")
+    for op, s in report['operations'].items():
+        print(f"{op:<14}{s['count']:>8}{s['errors']:>8}{s['rps']:>9}{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}{s['max_ms']:>10}")
+    locks = report['locks']
+    print(f"Ожидания блокировок: в среднем {locks['avg_waiting']}, максимум {locks['max_waiting']} "
+          f"(неполученных блокировок до {locks['max_ungranted_locks']}, самое долгое ожидание {locks['max_wait_sec']} с)")
+    for query, hits in locks['top_blocked']:
+        print(f"  {hits:>5} × {query}")
+    print(f"Deadlock'и: {report['deadlocks']}")
+    if 'bulk_visits_per_sec' in report:
+        print(f"Медицинских посещений в секунду (bulk): {report['bulk_visits_per_sec']}")
+    if 'validate_speedup' in report:
+        print(f"Проверка быстрее импорта (p50): в {report['validate_speedup']} раз")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
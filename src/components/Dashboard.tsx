@@ -3,7 +3,39 @@ import { useNavigate } from 'react-router-dom';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Alert, AlertDescription } from '@/components/ui/alert';
 import Icon from '@/components/ui/icon';
-import { militaryApi } from '@/lib/militaryApi';
+import { militaryApi, type PersonnelAlert, type Stats } from '@/lib/militaryApi';
+
+const ALERT_PREVIEW = 20;
+
+const AlertPeople = ({ type, source }: { type: PersonnelAlert['alert_type']; source?: Stats['alerts_source'] }) => {
+  const navigate = useNavigate();
+  // При source === 'live' таблица оповещений устарела — имена из неё не показываем
+  const fromTable = source === 'table';
+  const { data } = useQuery({
+    queryKey: ['dashboard-alerts', type],
+    queryFn: () => militaryApi.getAlerts(type, ALERT_PREVIEW),
+    refetchInterval: 30000,
+    enabled: fromTable,
+  });
+
+  if (!fromTable || !data || data.alerts.length === 0) return null;
+  const rest = data.total - data.alerts.length;
+
+  return (
+    <div className="mt-2 flex flex-wrap gap-2">
+      {data.alerts.map((a) => (
+        <button
+          key={a.id}
+          className={`text-xs underline ${a.severity === 'critical' ? 'font-semibold' : ''}`}
+          onClick={() => navigate(`/personnel/${a.personnel_id}`)}
+        >
+          {a.full_name}
+        </button>
+      ))}
+      {rest > 0 && <span className="text-xs">и ещё {rest}</span>}
+    </div>
+  );
+};
 
 const Dashboard = () => {
   const navigate = useNavigate();
@@ -56,6 +88,7 @@ const Dashboard = () => {
               <Icon name="AlertTriangle" size={18} />
               <AlertDescription>
                 <strong>{alerts.hosp_over_30}</strong> военнослужащих находятся в госпитале более 30 дней. Необходимо связаться!
+                <AlertPeople type="hosp_over_30" source={stats?.alerts_source} />
               </AlertDescription>
             </Alert>
           )}
@@ -64,6 +97,7 @@ const Dashboard = () => {
               <Icon name="AlertTriangle" size={18} />
               <AlertDescription>
                 <strong>{alerts.pvd_over_30}</strong> военнослужащих находятся в ПВД более 30 дней. Требуется разобраться!
+                <AlertPeople type="pvd_over_30" source={stats?.alerts_source} />
               </AlertDescription>
             </Alert>
           )}
@@ -72,6 +106,7 @@ const Dashboard = () => {
               <Icon name="AlertTriangle" size={18} />
               <AlertDescription>
                 <strong>{alerts.leave_overdue}</strong> военнослужащих просрочили возвращение из отпуска. Свяжитесь с ними!
+                <AlertPeople type="leave_overdue" source={stats?.alerts_source} />
               </AlertDescription>
             </Alert>
           )}
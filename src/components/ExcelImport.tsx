@@ -4,6 +4,7 @@ import { Button } from '@/components/ui/button';
 import { Alert, AlertDescription } from '@/components/ui/alert';
 import Icon from '@/components/ui/icon';
 import { useToast } from '@/hooks/use-toast';
+import { rememberWrite } from '@/lib/militaryApi';
 
 const IMPORT_URL = 'https://functions.poehali.dev/fd0fcc18-9605-4892-9bd4-d7f3eb69010c';
 
@@ -60,6 +61,7 @@ export default function ExcelImport() {
         const data = await response.json();
 
         if (response.ok && data.success) {
+          rememberWrite(response);
           setResult(data);
           toast({
             title: 'Импорт завершен',
@@ -1,5 +1,17 @@
 const API_URL = 'https://functions.poehali.dev/1832f881-34ce-4118-ae39-9d393481f0be';
 
+const WRITE_TOKEN_KEY = 'military-write-token';
+
+const readHeaders = (): HeadersInit => {
+  const token = sessionStorage.getItem(WRITE_TOKEN_KEY);
+  return token ? { 'X-Write-Token': token } : {};
+};
+
+export const rememberWrite = (response: Response) => {
+  const token = response.headers.get('X-Write-Token');
+  if (token) sessionStorage.setItem(WRITE_TOKEN_KEY, token);
+};
+
 export interface Personnel {
   id: number;
   personal_number: string;
@@ -53,6 +65,20 @@ export interface Stats {
     pvd_over_30: number;
     leave_overdue: number;
   };
+  alerts_source: 'table' | 'live';
+}
+
+export interface PersonnelAlert {
+  id: number;
+  personnel_id: number;
+  alert_type: 'hosp_over_30' | 'pvd_over_30' | 'leave_overdue';
+  since: string;
+  severity: 'warning' | 'critical';
+  full_name: string;
+  personal_number: string;
+  rank?: string;
+  unit?: string;
+  current_status: string;
 }
 
 export const militaryApi = {
@@ -62,19 +88,28 @@ export const militaryApi = {
     return response.json();
   },
 
+  async getAlerts(type?: string, limit = 50, offset = 0): Promise<{ alerts: PersonnelAlert[], counts: Record<string, number>, total: number }> {
+    const params = new URLSearchParams({ action: 'alerts', limit: String(limit), offset: String(offset) });
+    if (type) params.append('type', type);
+
+    const response = await fetch(`${API_URL}?${params}`, { headers: readHeaders() });
+    if (!response.ok) throw new Error('Failed to fetch alerts');
+    return response.json();
+  },
+
   async getPersonnel(search?: string, unit?: string, status?: string): Promise<{ personnel: Personnel[], units: string[] }> {
     const params = new URLSearchParams({ action: 'personnel' });
     if (search) params.append('search', search);
     if (unit) params.append('unit', unit);
     if (status) params.append('status', status);
     
-    const response = await fetch(`${API_URL}?${params}`);
+    const response = await fetch(`${API_URL}?${params}`, { headers: readHeaders() });
     if (!response.ok) throw new Error('Failed to fetch personnel');
     return response.json();
   },
 
   async getPersonnelDetail(id: number): Promise<{ personnel: Personnel, movements: Movement[], medical_visits: MedicalVisit[] }> {
-    const response = await fetch(`${API_URL}?action=personnel_detail&id=${id}`);
+    const response = await fetch(`${API_URL}?action=personnel_detail&id=${id}`, { headers: readHeaders() });
     if (!response.ok) throw new Error('Failed to fetch personnel detail');
     return response.json();
   },
@@ -86,6 +121,7 @@ export const militaryApi = {
       body: JSON.stringify(data)
     });
     if (!response.ok) throw new Error('Failed to create personnel');
+    rememberWrite(response);
     return response.json();
   },
 
@@ -96,6 +132,7 @@ export const militaryApi = {
       body: JSON.stringify(data)
     });
     if (!response.ok) throw new Error('Failed to update personnel');
+    rememberWrite(response);
     return response.json();
   },
 
@@ -106,6 +143,7 @@ export const militaryApi = {
       body: JSON.stringify(data)
     });
     if (!response.ok) throw new Error('Failed to add movement');
+    rememberWrite(response);
     return response.json();
   },
 
@@ -116,6 +154,18 @@ export const militaryApi = {
       body: JSON.stringify(data)
     });
     if (!response.ok) throw new Error('Failed to add medical visit');
+    rememberWrite(response);
+    return response.json();
+  },
+
+  async addMedicalVisitsBulk(payload: { visits: Array<Partial<MedicalVisit> & { personal_number?: string, fitness_category?: string }> } | { file: string }): Promise<{ inserted: number, categories_updated: number, skipped: number, errors: string[] }> {
+    const response = await fetch(`${API_URL}?action=add_medical_visits_bulk`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(payload)
+    });
+    if (!response.ok) throw new Error('Failed to add medical visits');
+    rememberWrite(response);
     return response.json();
   },
 
@@ -124,7 +174,7 @@ export const militaryApi = {
     if (unit) params.append('unit', unit);
     if (status) params.append('status', status);
     
-    const response = await fetch(`${API_URL}?${params}`);
+    const response = await fetch(`${API_URL}?${params}`, { headers: readHeaders() });
     if (!response.ok) throw new Error('Failed to export data');
     return response.json();
   }